@@ -9,6 +9,7 @@ All application logic lives in the ``src/`` package:
     src/honeypot_agent.py - Persona engine, state machine, LLM
     src/scam_detection.py - Multi-layer scam detection + red-flag identification
     src/intelligence.py   - Regex-based intelligence extraction
+    src/phrase_matcher.py - Single-pass keyword / trigger-phrase matching
     src/models.py         - Pydantic request / response models
     src/config.py         - Configuration constants & logging
     src/personas.py       - 4 AI persona definitions
@@ -12,6 +12,7 @@ Modules:
     models          - Pydantic request/response models
     scam_detection  - Multi-layer scam detection + red-flag identification
     intelligence    - Regex-based intelligence extraction
+    phrase_matcher  - Single-pass keyword / trigger-phrase matching
     honeypot_agent  - Persona engine, state machine, LLM integration
     main            - FastAPI application and endpoints
 """
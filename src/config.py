@@ -10,6 +10,8 @@ import re
 import logging
 from dotenv import load_dotenv
 
+from src.phrase_matcher import PhraseMatcher
+
 # ============================================================
 # ENVIRONMENT
 # ============================================================
@@ -44,6 +46,27 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 MIN_MESSAGES = 1   # Send callback from first turn for maximum coverage
 MAX_MESSAGES = 10  # Hard cap — evaluator sends at most 10 turns
 
+MAX_SESSIONS = 10_000          # LRU cap on in-memory sessions
+SESSION_TTL_SECONDS = 3600     # Drop sessions idle for longer than this
+SESSION_SWEEP_INTERVAL = 60    # Seconds between idle-session sweeps
+
+# Texts longer than this are analyzed in a worker thread so one huge
+# message or history blob can't stall the event loop
+ANALYSIS_OFFLOAD_CHARS = 4096
+
+# Intel buckets reported in extractedIntelligence / agent notes
+INTEL_KEYS = ("upiIds", "phoneNumbers", "bankAccounts", "phishingLinks", "emailAddresses")
+
+# Intel buckets the LLM keeps probing for until each holds at least one
+# item, mapped to the wording used in its "STILL MISSING" directive.
+PROBED_INTEL_LABELS: dict[str, str] = {
+    "phoneNumbers": "phone number",
+    "upiIds": "UPI ID",
+    "emailAddresses": "email address",
+    "phishingLinks": "website link",
+    "bankAccounts": "bank account number",
+}
+
 # ============================================================
 # SCAM DETECTION KEYWORDS
 # ============================================================
@@ -102,6 +125,9 @@ SCAM_KEYWORDS: tuple[str, ...] = (
     "clearance", "duty", "import", "export", "consignment",
 )
 
+# One-pass scanner over SCAM_KEYWORDS (expects casefolded text).
+SCAM_KEYWORD_MATCHER = PhraseMatcher(SCAM_KEYWORDS)
+
 # ============================================================
 # RED-FLAG CATEGORIES
 # ============================================================
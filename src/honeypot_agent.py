@@ -5,34 +5,41 @@ Responsibilities:
     - Session management (create / retrieve sessions)
     - Deterministic state machine (trust_building → probing → extraction → winding_down)
     - Persona auto-selection (locked per session on first message)
-    - LLM response generation via Groq (llama-3.3-70b-versatile)
+    - LLM response generation via Groq (llama-3.3-70b-versatile), streamed
     - Response sanitization (block forbidden patterns + length cap)
     - Fallback / suspicion responses when LLM unavailable
 """
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
 import random
+import re
 import time
-from datetime import datetime
-from typing import Dict
+from collections import OrderedDict
 
 from src.config import (
     FORBIDDEN_PATTERNS,
     MAX_MESSAGES,
+    MAX_SESSIONS,
     MIN_MESSAGES,
     NAIVE_RESPONSES,
-    SCAM_KEYWORDS,
+    PROBED_INTEL_LABELS,
+    SESSION_TTL_SECONDS,
     logger,
 )
+from src.personas import get_optimal_persona
 
 
 # ============================================================
 # SESSION MANAGEMENT
 # ============================================================
 
-sessions: Dict[str, dict] = {}
+# Ordered least- to most-recently active; see get_session() and
+# evict_idle_sessions().
+sessions: OrderedDict[str, dict] = OrderedDict()
 
 
 def get_session(session_id: str) -> dict:
@@ -41,9 +48,15 @@ def get_session(session_id: str) -> dict:
 
     Session lifecycle:
         trust_building → probing → extraction → winding_down → terminated
+
+    Sessions live in an LRU: once more than ``MAX_SESSIONS`` exist, the
+    least recently active one is dropped.
     """
-    if session_id not in sessions:
-        logger.info(f"Creating new session: {session_id}")
+    now = time.monotonic()
+    if session_id in sessions:
+        sessions.move_to_end(session_id)
+    else:
+        logger.info("Creating new session: %s", session_id)
         sessions[session_id] = {
             "messages_exchanged": 0,
             "scam_detected": False,
@@ -58,16 +71,57 @@ def get_session(session_id: str) -> dict:
                 "emailAddresses": [],
                 "suspiciousKeywords": [],
             },
+            # Companion sets for O(1) dedup of the intel lists above
+            "extracted_intelligence_sets": {
+                "bankAccounts": set(),
+                "upiIds": set(),  # lowercased — UPI dedup is case-insensitive
+                "phishingLinks": set(),
+                "phoneNumbers": set(),
+                "emailAddresses": set(),
+                "suspiciousKeywords": set(),
+            },
+            "phone_digits": set(),  # digit forms of every stored phone number
+            # Probed intel types not captured yet; emptied by extract_intelligence()
+            "_missing": dict(PROBED_INTEL_LABELS),
             "red_flags": [],  # cumulative red-flag labels
+            "red_flags_set": set(),  # mirrors red_flags for O(1) dedup
             "callback_sent": False,
-            "start_time": time.time(),
-            "last_activity": time.time(),
+            # Monotonic clock — only ever used for durations / idle checks
+            "start_time": now,
+            "last_activity": now,
             "conversation": [],
+            # Chat-format LLM context, see _sync_messages_prefix()
+            "_messages_prefix": [],
+            "_prefix_synced": 0,
+            "_capped_response": None,  # (cache key, JSON body), see honeypot()
         }
-    sessions[session_id]["last_activity"] = time.time()
+        if len(sessions) > MAX_SESSIONS:
+            evicted_id, _ = sessions.popitem(last=False)
+            logger.info("Session cap reached — evicted %s", evicted_id)
+    sessions[session_id]["last_activity"] = now
     return sessions[session_id]
 
 
+def evict_idle_sessions() -> int:
+    """
+    Drop sessions idle for longer than ``SESSION_TTL_SECONDS``.
+
+    ``sessions`` is kept in activity order, so only the stale prefix is
+    visited.  Returns the number of sessions evicted.
+    """
+    cutoff = time.monotonic() - SESSION_TTL_SECONDS
+    evicted = 0
+    while sessions:
+        oldest_id, oldest = next(iter(sessions.items()))
+        if oldest["last_activity"] > cutoff:
+            break
+        del sessions[oldest_id]
+        evicted += 1
+    if evicted:
+        logger.info("Evicted %d idle session(s)", evicted)
+    return evicted
+
+
 # ============================================================
 # STATE MACHINE (Layer 2: Agent Controller)
 # ============================================================
@@ -83,7 +137,102 @@ def transition_state(session: dict) -> None:
         session["state"] = "extraction"
     else:
         session["state"] = "winding_down"
-    logger.debug(f"State → {session['state']} (message {n})")
+    logger.debug("State → %s (message %d)", session["state"], n)
+
+
+# Phase directives indexed by turn bucket (see :func:`_turn_bucket`).
+_PHASE_INSTRUCTIONS: tuple[str, ...] = (
+    # Turn 1
+    "You just received this call/message from a STRANGER. "
+    "Be naturally confused or curious — you don't know who this is. "
+    "Ask only ONE simple question like 'Kaun bol raha hai?' or "
+    "'Haan ji, kya baat hai?' or 'Aap kaun?'. "
+    "Do NOT ask for bank/UPI/phone/email yet — that would be weird "
+    "on the very first message. Just respond like any normal person "
+    "who got a random call. Keep it to 1-2 short sentences.",
+    # Turns 2-3
+    "You are starting to understand what they want. Show mild "
+    "concern or interest based on what they said. "
+    "Ask ONE natural follow-up question — like 'Aapka number kya hai, "
+    "main call back karungi?' OR 'Kaunsi bank se ho aap?'. "
+    "Only ONE question per turn — don't interrogate. "
+    "Show your personality — be chatty, confused, or worried.",
+    # Turns 4-6
+    "You are now somewhat engaged and starting to worry/believe. "
+    "Ask for verification details more actively: "
+    "'UPI pe bhej do na details' or 'Apna phone number do, main note kar leti hoon'. "
+    "Try to get: phone number, UPI ID, bank name, any links they share. "
+    "Ask for 1-2 things per turn — be more direct but still in character. "
+    "Express confusion about technology to seem authentic.",
+    # Turns 7-8
+    "You are ready to comply but need ALL their details first. "
+    "'Main paisa bhejti hoon — UPI ID bolo na? Woh @ ke baad kya aata hai?' "
+    "'Account number bolo jismein transfer karoon. IFSC code bhi dena.' "
+    "'Link phir se bhejo, phone pe chhota dikhta hai — pura http se bolo.' "
+    "'Email pe documents bhejoongi — aapka email ID kya hai?' "
+    "'Phone number ek baar aur bolo, network kharab tha sun nahi paya.' "
+    "Almost comply with EVERYTHING but keep asking for ONE MORE missing detail. "
+    "In EVERY reply, ask for at least 2 different pieces of information.",
+    # Turns 9+
+    "You are getting doubtful. Your son/neighbour is warning about fraud. "
+    "Ask: 'Employee ID kya hai aapka? Branch ka phone number do.' "
+    "Say: 'Mera beta bol raha hai email pe proof bhejo — aapka email kya hai?' "
+    "Say: 'Website ka link do, beta Google pe check karega.' "
+    "Ask for UPI ID one more time: 'Google Pay pe verify karna hai, UPI ID bolo.' "
+    "Ask for bank account number: 'Padosan bol rahi thi account number se trace hota hai — bolo na.' "
+    "Keep extracting every possible identifier while showing increasing doubt.",
+)
+
+# Reply rules indexed by turn bucket: turn 1, turns 2-3, turns 4+.
+_RULES_EARLY = (
+    "RULES:\n"
+    "- 1-2 sentences ONLY. Very short, casual.\n"
+    "- NEVER give real OTP/PIN/password/account number\n"
+    "- NEVER break character\n"
+    "- NEVER say 'I will' or 'Let me' (English-style)\n"
+    "- NEVER write explanations or reasoning\n"
+    "- Do NOT ask for phone/UPI/email/bank yet — just respond naturally\n"
+    "- Sound confused or curious, like a normal person getting a random message"
+)
+_RULES_MID = (
+    "RULES:\n"
+    "- 2-3 sentences. Short, messy, natural Hinglish.\n"
+    "- NEVER give real OTP/PIN/password/account number\n"
+    "- NEVER break character\n"
+    "- NEVER say 'I will' or 'Let me' (English-style)\n"
+    "- NEVER write explanations or reasoning\n"
+    "- Ask for ONE thing naturally (phone number OR bank name OR UPI)\n"
+    "- Show concern or interest naturally — be in character"
+)
+_RULES_LATE = (
+    "RULES:\n"
+    "- 2-3 sentences. Short, messy, natural Hinglish.\n"
+    "- NEVER give real OTP/PIN/password/account number\n"
+    "- NEVER break character\n"
+    "- NEVER say 'I will' or 'Let me' (English-style)\n"
+    "- NEVER write explanations or reasoning\n"
+    "- ALWAYS ask for at LEAST 2 of these in every reply: phone number, "
+    "UPI ID, email address, website link, bank account number\n"
+    "- Examples: 'Aapka number kya hai? UPI ID bhi bolo na?', "
+    "'Link bhejo na? Aur email pe bhi details bhej do.', "
+    "'Account number bolo aur phone number bhi do backup ke liye.'\n"
+    "- Mention your financial details vaguely to keep them interested\n"
+    "- Show eagerness to cooperate but ALWAYS demand their contact info first"
+)
+_RULES: tuple[str, ...] = (_RULES_EARLY, _RULES_MID, _RULES_LATE)
+
+
+def _turn_bucket(turn: int) -> int:
+    """Map a 1-based turn number onto an index into :data:`_PHASE_INSTRUCTIONS`."""
+    if turn <= 1:
+        return 0
+    if turn <= 3:
+        return 1
+    if turn <= 6:
+        return 2
+    if turn <= 8:
+        return 3
+    return 4
 
 
 def get_phase_instruction(session: dict) -> str:
@@ -97,66 +246,25 @@ def get_phase_instruction(session: dict) -> str:
     immediately.
     """
     turn = session["messages_exchanged"] + 1  # next turn about to happen
-
-    if turn <= 1:
-        return (
-            "You just received this call/message from a STRANGER. "
-            "Be naturally confused or curious — you don't know who this is. "
-            "Ask only ONE simple question like 'Kaun bol raha hai?' or "
-            "'Haan ji, kya baat hai?' or 'Aap kaun?'. "
-            "Do NOT ask for bank/UPI/phone/email yet — that would be weird "
-            "on the very first message. Just respond like any normal person "
-            "who got a random call. Keep it to 1-2 short sentences."
-        )
-    elif turn <= 3:
-        return (
-            "You are starting to understand what they want. Show mild "
-            "concern or interest based on what they said. "
-            "Ask ONE natural follow-up question — like 'Aapka number kya hai, "
-            "main call back karungi?' OR 'Kaunsi bank se ho aap?'. "
-            "Only ONE question per turn — don't interrogate. "
-            "Show your personality — be chatty, confused, or worried."
-        )
-    elif turn <= 6:
-        return (
-            "You are now somewhat engaged and starting to worry/believe. "
-            "Ask for verification details more actively: "
-            "'UPI pe bhej do na details' or 'Apna phone number do, main note kar leti hoon'. "
-            "Try to get: phone number, UPI ID, bank name, any links they share. "
-            "Ask for 1-2 things per turn — be more direct but still in character. "
-            "Express confusion about technology to seem authentic."
-        )
-    elif turn <= 8:
-        return (
-            "You are ready to comply but need ALL their details first. "
-            "'Main paisa bhejti hoon — UPI ID bolo na? Woh @ ke baad kya aata hai?' "
-            "'Account number bolo jismein transfer karoon. IFSC code bhi dena.' "
-            "'Link phir se bhejo, phone pe chhota dikhta hai — pura http se bolo.' "
-            "'Email pe documents bhejoongi — aapka email ID kya hai?' "
-            "'Phone number ek baar aur bolo, network kharab tha sun nahi paya.' "
-            "Almost comply with EVERYTHING but keep asking for ONE MORE missing detail. "
-            "In EVERY reply, ask for at least 2 different pieces of information."
-        )
-    else:
-        return (
-            "You are getting doubtful. Your son/neighbour is warning about fraud. "
-            "Ask: 'Employee ID kya hai aapka? Branch ka phone number do.' "
-            "Say: 'Mera beta bol raha hai email pe proof bhejo — aapka email kya hai?' "
-            "Say: 'Website ka link do, beta Google pe check karega.' "
-            "Ask for UPI ID one more time: 'Google Pay pe verify karna hai, UPI ID bolo.' "
-            "Ask for bank account number: 'Padosan bol rahi thi account number se trace hota hai — bolo na.' "
-            "Keep extracting every possible identifier while showing increasing doubt."
-        )
+    return _PHASE_INSTRUCTIONS[_turn_bucket(turn)]
 
 
 # ============================================================
 # RESPONSE GENERATION — FALLBACKS
 # ============================================================
 
+_NAIVE_COUNT = len(NAIVE_RESPONSES)
+
+
 def get_agent_response(session: dict, scammer_message: str) -> str:
-    """Rotate through naive responses (fallback when LLM unavailable)."""
-    idx = session["messages_exchanged"] % len(NAIVE_RESPONSES)
-    return NAIVE_RESPONSES[idx]
+    """
+    Rotate through naive responses (fallback when LLM unavailable).
+
+    Indexed by turn, not by how often the fallback has fired:
+    NAIVE_RESPONSES is ordered by phase, so a turn the LLM answered must
+    still move the rotation on.
+    """
+    return NAIVE_RESPONSES[session["messages_exchanged"] % _NAIVE_COUNT]
 
 
 _SUSPICION_REPLIES: tuple[str, ...] = (
@@ -168,10 +276,13 @@ _SUSPICION_REPLIES: tuple[str, ...] = (
     "Ji? Kya hua? Aap kaun bol rahe ho?",
 )
 
+# Module-private generator so reply picks don't share the global random state.
+_rng = random.Random()
+
 
 def get_suspicion_reply() -> str:
     """Reply when suspicion is detected but not yet confirmed."""
-    return random.choice(_SUSPICION_REPLIES)
+    return _SUSPICION_REPLIES[_rng.randrange(len(_SUSPICION_REPLIES))]
 
 
 # ============================================================
@@ -180,152 +291,158 @@ def get_suspicion_reply() -> str:
 
 groq_client = None
 
+# All forbidden patterns in one alternation: a single pass over the reply
+# instead of one substring scan per pattern.
+_FORBIDDEN_RE = re.compile(
+    "|".join(re.escape(p) for p in FORBIDDEN_PATTERNS),
+    re.IGNORECASE,
+)
+# Longest pattern — how far back a match can straddle a chunk boundary.
+_FORBIDDEN_MAX_LEN = max(len(p) for p in FORBIDDEN_PATTERNS)
+
+MAX_REPLY_CHARS = 400
+CONTEXT_EXCHANGES = 6  # past exchanges sent to the LLM as context
+LLM_SLA_SECONDS = 8.0  # whole-reply deadline before falling back
+
 
 def init_groq() -> None:
     """Initialise Groq client if API key is available."""
     global groq_client
     try:
-        from groq import Groq
+        from groq import AsyncGroq
 
         api_key = os.getenv("GROQ_API_KEY")
         if api_key:
-            groq_client = Groq(api_key=api_key, timeout=15.0)
+            groq_client = AsyncGroq(api_key=api_key, timeout=15.0)
             logger.info("Groq LLM initialised successfully")
         else:
             logger.warning("GROQ_API_KEY not found — using fallback responses")
     except Exception as e:
-        logger.error(f"Failed to initialise Groq: {e}")
+        logger.error("Failed to initialise Groq: %s", e)
 
 
 # Initialise on module import
 init_groq()
 
 
-def get_llm_response(session: dict, scammer_message: str) -> str:
+@functools.lru_cache(maxsize=1024)
+def _select_persona(opening_message: str) -> tuple[str, str]:
+    """Memoised :func:`get_optimal_persona` — scam openers repeat a lot."""
+    return get_optimal_persona(opening_message)
+
+
+def _sync_messages_prefix(session: dict) -> list[dict]:
+    """
+    Return the chat-format context for the last ``CONTEXT_EXCHANGES``
+    exchanges.
+
+    The list is cached on the session and only exchanges recorded since
+    the previous call are converted, so each turn appends two messages
+    instead of rebuilding the whole context.
+    """
+    prefix = session["_messages_prefix"]
+    conversation = session["conversation"]
+    for msg in conversation[session["_prefix_synced"]:]:
+        prefix.append({"role": "user", "content": msg["scammer"]})
+        prefix.append({"role": "assistant", "content": msg["agent"]})
+    session["_prefix_synced"] = len(conversation)
+    del prefix[:-2 * CONTEXT_EXCHANGES]
+    return prefix
+
+
+async def _stream_reply(messages: list[dict]) -> str | None:
+    """
+    Stream a completion from Groq and sanitise it as tokens arrive.
+
+    Generation is abandoned as soon as the partial reply contains a
+    forbidden pattern or grows past ``MAX_REPLY_CHARS``, instead of
+    waiting for a reply that will be thrown away anyway.  Returns the
+    stripped reply, or None if it was rejected.
+    """
+    stream = await groq_client.chat.completions.create(
+        model="llama-3.3-70b-versatile",
+        messages=messages,
+        max_tokens=200,
+        temperature=0.85,
+        stream=True,
+    )
+    reply = ""
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            # Only the tail can hold a match that straddles the new chunk
+            scan_from = max(0, len(reply) - _FORBIDDEN_MAX_LEN)
+            reply += delta
+            blocked = _FORBIDDEN_RE.search(reply, scan_from)
+            if blocked:
+                logger.warning("Blocked forbidden pattern '%s' in LLM output", blocked.group(0))
+                return None
+            if len(reply.strip()) > MAX_REPLY_CHARS:
+                logger.warning("Blocked overlong LLM output (>%d chars)", MAX_REPLY_CHARS)
+                return None
+    finally:
+        await stream.close()
+    return reply.strip()
+
+
+async def get_llm_response(session: dict, scammer_message: str) -> str:
     """
     Generate an LLM persona response.
 
     Falls back to :func:`get_agent_response` when:
         - Groq client is unavailable
+        - The reply is not complete within ``LLM_SLA_SECONDS``
         - Response contains forbidden patterns
-        - Response exceeds 400 characters
+        - Response exceeds ``MAX_REPLY_CHARS`` characters
         - Any exception occurs
     """
     if not groq_client:
         return get_agent_response(session, scammer_message)
 
     try:
-        # Auto-select persona once per session
-        from src.personas import get_optimal_persona
-
+        # Auto-select persona once per session.  Selection lowercases the
+        # message itself, so normalising the cache key is safe.
         if session.get("persona_name") is None:
-            name, prompt = get_optimal_persona(scammer_message)
+            name, prompt = _select_persona(scammer_message.lower().strip())
             session["persona_name"] = name
             session["persona_prompt"] = prompt
-            logger.info(f"Session persona locked: {name}")
+            logger.info("Session persona locked: %s", name)
         else:
             prompt = session["persona_prompt"]
 
-        # Build conversation context (last 6 messages)
-        history = session["conversation"][-6:]
         phase_instruction = get_phase_instruction(session)
 
-        # Determine what intelligence we're still missing
-        intel = session["extracted_intelligence"]
-        missing: list[str] = []
-        if not intel["phoneNumbers"]:
-            missing.append("phone number")
-        if not intel["upiIds"]:
-            missing.append("UPI ID")
-        if not intel["emailAddresses"]:
-            missing.append("email address")
-        if not intel["phishingLinks"]:
-            missing.append("website link")
-        if not intel["bankAccounts"]:
-            missing.append("bank account number")
-
-        missing_str = ", ".join(missing) if missing else "any new contact detail"
+        # What intelligence we're still missing (kept current by extraction)
+        missing_str = ", ".join(session["_missing"].values()) or "any new contact detail"
 
         # Turn-aware rules: early turns are casual, later turns probe hard
         turn = session["messages_exchanged"] + 1
-        if turn <= 1:
-            rules = (
-                "RULES:\n"
-                "- 1-2 sentences ONLY. Very short, casual.\n"
-                "- NEVER give real OTP/PIN/password/account number\n"
-                "- NEVER break character\n"
-                "- NEVER say 'I will' or 'Let me' (English-style)\n"
-                "- NEVER write explanations or reasoning\n"
-                "- Do NOT ask for phone/UPI/email/bank yet — just respond naturally\n"
-                "- Sound confused or curious, like a normal person getting a random message"
-            )
-        elif turn <= 3:
-            rules = (
-                "RULES:\n"
-                "- 2-3 sentences. Short, messy, natural Hinglish.\n"
-                "- NEVER give real OTP/PIN/password/account number\n"
-                "- NEVER break character\n"
-                "- NEVER say 'I will' or 'Let me' (English-style)\n"
-                "- NEVER write explanations or reasoning\n"
-                "- Ask for ONE thing naturally (phone number OR bank name OR UPI)\n"
-                "- Show concern or interest naturally — be in character"
-            )
-        else:
-            rules = (
-                "RULES:\n"
-                "- 2-3 sentences. Short, messy, natural Hinglish.\n"
-                "- NEVER give real OTP/PIN/password/account number\n"
-                "- NEVER break character\n"
-                "- NEVER say 'I will' or 'Let me' (English-style)\n"
-                "- NEVER write explanations or reasoning\n"
-                "- ALWAYS ask for at LEAST 2 of these in every reply: phone number, "
-                "UPI ID, email address, website link, bank account number\n"
-                "- Examples: 'Aapka number kya hai? UPI ID bhi bolo na?', "
-                "'Link bhejo na? Aur email pe bhi details bhej do.', "
-                "'Account number bolo aur phone number bhi do backup ke liye.'\n"
-                "- Mention your financial details vaguely to keep them interested\n"
-                "- Show eagerness to cooperate but ALWAYS demand their contact info first"
-            )
-
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    f"{prompt}\n\n"
-                    f"CURRENT PHASE: {phase_instruction}\n\n"
-                    f"STILL MISSING: We still need their {missing_str}.\n\n"
-                    f"{rules}"
-                ),
-            }
-        ]
-
-        for msg in history:
-            messages.append({"role": "user", "content": msg["scammer"]})
-            messages.append({"role": "assistant", "content": msg["agent"]})
-        messages.append({"role": "user", "content": scammer_message})
-
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            max_tokens=200,
-            temperature=0.85,
-        )
-
-        reply = response.choices[0].message.content.strip()
-
-        # Sanitisation
-        reply_lower = reply.casefold()
-        for pattern in FORBIDDEN_PATTERNS:
-            if pattern in reply_lower:
-                logger.warning(f"Blocked forbidden pattern '{pattern}' in LLM output")
-                return get_agent_response(session, scammer_message)
-
-        if len(reply) > 400:
-            logger.warning(f"Blocked overlong LLM output ({len(reply)} chars)")
+        rules = _RULES[0 if turn <= 1 else 1 if turn <= 3 else 2]
+
+        system = {
+            "role": "system",
+            "content": (
+                f"{prompt}\n\n"
+                f"CURRENT PHASE: {phase_instruction}\n\n"
+                f"STILL MISSING: We still need their {missing_str}.\n\n"
+                f"{rules}"
+            ),
+        }
+        # Conversation context (last CONTEXT_EXCHANGES exchanges)
+        messages = [system, *_sync_messages_prefix(session), {"role": "user", "content": scammer_message}]
+
+        try:
+            async with asyncio.timeout(LLM_SLA_SECONDS):
+                reply = await _stream_reply(messages)
+        except TimeoutError:
+            logger.warning("LLM SLA exceeded (%ss) — using fallback", LLM_SLA_SECONDS)
             return get_agent_response(session, scammer_message)
-
         return reply if reply else get_agent_response(session, scammer_message)
 
     except Exception as e:
-        logger.error(f"LLM error: {e}")
+        logger.error("LLM error: %s", e)
         return get_agent_response(session, scammer_message)
@@ -11,33 +11,71 @@ Extracts and deduplicates the following from scammer messages:
 
 All extraction is idempotent — calling multiple times on the same text
 will not produce duplicates.
+
+Individual hits are logged at DEBUG only; main.py logs a per-session
+summary when the conversation reaches MAX_MESSAGES.
 """
 
 from __future__ import annotations
 
 import re
 
-from src.config import COMPILED_PATTERNS, KNOWN_UPI_HANDLES, SCAM_KEYWORDS, logger
+from src.config import KNOWN_UPI_HANDLES, logger
+from src.scam_detection import MessageAnalysis, analyze_message
 
+# Translate table for stripping separators from phone / account matches.
+# The patterns only allow digits, "+", whitespace and ".-()" separators,
+# so deleting the separators is equivalent to a regex substitution.
+_WHITESPACE = "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+_STRIP_SEPARATORS = str.maketrans("", "", _WHITESPACE + ".-()")
+# Not a translate table: the patterns' \d also matches non-ASCII digits
+# (e.g. Devanagari), which must be dropped, not kept, here.
+_NON_ASCII_DIGIT = re.compile(r"[^0-9]")
 
-def extract_intelligence_from_history(conversation_history: list, session: dict) -> None:
-    """
-    Aggressively scan ALL conversation history turns for intelligence.
-    Extracts from both scammer and user messages.
-    """
-    if not conversation_history:
-        return
-    for msg in conversation_history:
-        if isinstance(msg, dict):
-            text = msg.get("text", "") or msg.get("content", "")
+
+# Joins history turns into one blob. NUL is neither whitespace nor a
+# character any COMPILED_PATTERNS class accepts, and the newlines end every
+# [^\s]+ run, so no pattern can match across two turns.
+HISTORY_SEP = "\n\0\n"
+
+
+def history_texts(history: list):
+    """Yield the non-empty text of each dict entry in *history*."""
+    for hist_msg in history:
+        if isinstance(hist_msg, dict):
+            text = hist_msg.get("text", "") or hist_msg.get("content", "")
             if text:
-                extract_intelligence(text, session)
+                yield text
 
 
-def extract_intelligence(text: str, session: dict) -> None:
+def _store(session: dict, key: str, value: str, marker: str | None = None) -> bool:
+    """
+    Append *value* to the ``key`` intel bucket unless already present.
+
+    Membership is checked against the session's companion set (keyed by
+    *marker*, defaulting to *value*) so dedup stays O(1) however many items
+    the session has accumulated.  The first item of a bucket also clears
+    it from the session's ``_missing`` probe list.  Returns True if
+    *value* was added.
+    """
+    seen = session["extracted_intelligence_sets"].setdefault(key, set())
+    if marker is None:
+        marker = value
+    if marker in seen:
+        return False
+    seen.add(marker)
+    session["extracted_intelligence"].setdefault(key, []).append(value)
+    session["_missing"].pop(key, None)
+    return True
+
+
+def extract_intelligence(text: str, session: dict, analysis: MessageAnalysis | None = None) -> None:
     """
     Extract actionable intelligence from *text* and store in *session*.
 
+    Pattern hits and keywords come from *analysis* (computed here if the
+    caller doesn't already have one), so no regex runs twice per message.
+
     Extraction order matters:
     1. Emails first (to prevent UPI regex from eating email fragments)
     2. UPI IDs (skip anything already captured as email)
@@ -46,26 +84,29 @@ def extract_intelligence(text: str, session: dict) -> None:
     5. Bank accounts (deduplicated against phone digits)
     6. Suspicious keywords
     """
+    if analysis is None:
+        analysis = analyze_message(text)
+    matches = analysis.matches
     intel = session["extracted_intelligence"]
+    seen = session["extracted_intelligence_sets"]
+    phone_digits: set[str] = session["phone_digits"]
 
     # 1. Emails ----------------------------------------------------------
-    for match in COMPILED_PATTERNS["email"].findall(text):
-        if match not in intel["emailAddresses"]:
-            intel["emailAddresses"].append(match)
-            logger.info(f"Extracted email: {match}")
+    email_matches = matches["email"]
+    for match in email_matches:
+        if _store(session, "emailAddresses", match):
+            logger.debug("Extracted email: %s", match)
 
     # 2. UPI IDs ---------------------------------------------------------
     # Build set of all email matches in text for cross-referencing
-    all_email_matches = set(COMPILED_PATTERNS["email"].findall(text))
-    all_emails_lower = {e.lower() for e in (all_email_matches | set(intel["emailAddresses"]))}
+    all_emails_lower = {e.lower() for e in email_matches} | {e.lower() for e in intel["emailAddresses"]}
 
-    for match in COMPILED_PATTERNS["upi"].findall(text):
+    for match in matches["upi"]:
         match_lower = match.lower()
         domain_part = match_lower.split("@", 1)[-1] if "@" in match_lower else ""
 
-        # Case-insensitive dedup
-        existing_lower = {u.lower() for u in intel["upiIds"]}
-        if match_lower in existing_lower:
+        # Case-insensitive dedup (the UPI set holds lowercased IDs)
+        if match_lower in seen["upiIds"]:
             continue
 
         # ALWAYS check: skip if this match is a prefix/fragment of a full email
@@ -76,29 +117,29 @@ def extract_intelligence(text: str, session: dict) -> None:
             for email in all_emails_lower
         )
         if is_email_fragment:
-            logger.debug(f"Skipped UPI candidate '{match}' — fragment of email")
+            logger.debug("Skipped UPI candidate %r — fragment of email", match)
             continue
 
         # Positive match: domain is a known UPI handle → definitely UPI
         is_known_upi = domain_part in KNOWN_UPI_HANDLES
         if is_known_upi:
-            intel["upiIds"].append(match)
-            logger.info(f"Extracted UPI ID (known handle): {match}")
+            _store(session, "upiIds", match, match_lower)
+            logger.debug("Extracted UPI ID (known handle): %s", match)
             continue
 
         # Skip if it looks like a full email (has a dot-separated TLD after @)
         has_tld = bool(re.match(r"[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", domain_part))
         if not has_tld:
-            intel["upiIds"].append(match)
-            logger.info(f"Extracted UPI ID: {match}")
+            _store(session, "upiIds", match, match_lower)
+            logger.debug("Extracted UPI ID: %s", match)
 
     # 3. Phone numbers ---------------------------------------------------
     # The evaluator uses substring matching: `fake_value in str(v)`
     # If fakeData = "+91-9876543210", our extracted value must CONTAIN that
     # exact string. So we store multiple format variants to maximize matches.
-    for match in COMPILED_PATTERNS["phone"].findall(text):
+    for match in matches["phone"]:
         original = match.strip()
-        clean = re.sub(r"[\s.\-()]", "", original)
+        clean = original.translate(_STRIP_SEPARATORS)
         # Collect all format variants to store
         variants: list[str] = []
         # Always add the original verbatim format from the message
@@ -106,7 +147,7 @@ def extract_intelligence(text: str, session: dict) -> None:
         # Add the fully cleaned version (digits only, e.g. +919876543210 or 9876543210)
         variants.append(clean)
         # Generate common Indian phone format variants for substring matching
-        digits_only = re.sub(r"[^0-9]", "", clean)
+        digits_only = _NON_ASCII_DIGIT.sub("", clean)
         if len(digits_only) >= 10:
             bare_10 = digits_only[-10:]  # last 10 digits
             # +91-XXXXXXXXXX format (evaluator commonly uses this)
@@ -121,57 +162,47 @@ def extract_intelligence(text: str, session: dict) -> None:
             variants.append(f"+91 {bare_10[:5]} {bare_10[5:]}")
             # Hyphenated format: +91-XXXXX-XXXXX
             variants.append(f"+91-{bare_10[:5]}-{bare_10[5:]}")
-        # Deduplicate and store all variants
+        # Deduplicate and store all variants, keeping the phone-digit
+        # index (used to tell bank accounts from phones) in step
         for v in variants:
-            if v and v not in intel["phoneNumbers"]:
-                intel["phoneNumbers"].append(v)
+            if v and _store(session, "phoneNumbers", v):
+                digits = _NON_ASCII_DIGIT.sub("", v)
+                phone_digits.add(digits)
+                phone_digits.add(digits[-10:])
         if variants:
-            logger.info(f"Extracted phone: {original} ({len(variants)} variants)")
+            logger.debug("Extracted phone: %s (%d variants)", original, len(variants))
 
     # 4. URLs ------------------------------------------------------------
-    for match in COMPILED_PATTERNS["url"].findall(text):
+    for match in matches["url"]:
         clean_url = match.rstrip(".,;:!?)")
-        if clean_url not in intel["phishingLinks"]:
-            intel["phishingLinks"].append(clean_url)
-            logger.info(f"Extracted URL: {clean_url}")
+        if _store(session, "phishingLinks", clean_url):
+            logger.debug("Extracted URL: %s", clean_url)
 
     # 5. Bank accounts ---------------------------------------------------
-    phone_digits: set[str] = set()
-    for pn in intel["phoneNumbers"]:
-        digits = re.sub(r"[^0-9]", "", pn)
-        phone_digits.add(digits)
-        phone_digits.add(digits[-10:])
-
-    for match in COMPILED_PATTERNS["bank_account"].findall(text):
-        if match not in intel["bankAccounts"] and match not in phone_digits:
-            intel["bankAccounts"].append(match)
-            logger.info(f"Extracted bank account: {match}")
+    for match in matches["bank_account"]:
+        if match not in phone_digits and _store(session, "bankAccounts", match):
+            logger.debug("Extracted bank account: %s", match)
 
     # 5b. Spaced bank accounts (e.g., "1234 5678 9012 34") ---------------
     # Store BOTH the original spaced format AND the cleaned version
     # because evaluator does substring matching and fakeData could be either format
-    if "bank_account_spaced" in COMPILED_PATTERNS:
-        for match in COMPILED_PATTERNS["bank_account_spaced"].findall(text):
+    if "bank_account_spaced" in matches:
+        for match in matches["bank_account_spaced"]:
             original_spaced = match.strip()
-            clean = re.sub(r"[\s.\-]", "", original_spaced)
-            if clean not in intel["bankAccounts"] and clean not in phone_digits:
-                intel["bankAccounts"].append(clean)
-                logger.info(f"Extracted bank account (spaced→cleaned): {clean}")
-            if original_spaced != clean and original_spaced not in intel["bankAccounts"] and clean not in phone_digits:
-                intel["bankAccounts"].append(original_spaced)
-                logger.info(f"Extracted bank account (spaced original): {original_spaced}")
+            clean = original_spaced.translate(_STRIP_SEPARATORS)
+            if clean in phone_digits:
+                continue
+            if _store(session, "bankAccounts", clean):
+                logger.debug("Extracted bank account (spaced→cleaned): %s", clean)
+            if original_spaced != clean and _store(session, "bankAccounts", original_spaced):
+                logger.debug("Extracted bank account (spaced original): %s", original_spaced)
 
     # 6. IFSC codes -------------------------------------------------------
-    if "ifsc" in COMPILED_PATTERNS:
-        for match in COMPILED_PATTERNS["ifsc"].findall(text):
-            if match not in intel.get("ifscCodes", []):
-                if "ifscCodes" not in intel:
-                    intel["ifscCodes"] = []
-                intel["ifscCodes"].append(match)
-                logger.info(f"Extracted IFSC code: {match}")
+    if "ifsc" in matches:
+        for match in matches["ifsc"]:
+            if _store(session, "ifscCodes", match):
+                logger.debug("Extracted IFSC code: %s", match)
 
     # 7. Suspicious keywords ---------------------------------------------
-    text_lower = text.casefold()
-    for kw in SCAM_KEYWORDS:
-        if kw in text_lower and kw not in intel["suspiciousKeywords"]:
-            intel["suspiciousKeywords"].append(kw)
+    for kw in analysis.keywords:
+        _store(session, "suspiciousKeywords", kw)
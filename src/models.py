@@ -2,12 +2,12 @@
 Pydantic request / response models for the Honeypot API.
 
 Provides strict validation with graceful fallbacks:
-- MessageField accepts string or object payloads
+- MessageField accepts string or object payloads ("text" or "content")
 - Timestamp accepts both epoch integers and ISO strings
 - All optional fields have sensible defaults
 """
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Union
 
 
@@ -18,7 +18,13 @@ from typing import Optional, List, Dict, Union
 class MessageField(BaseModel):
     """Message payload — either a string or structured object."""
 
-    text: str = Field(..., description="The message content")
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    text: str = Field(
+        ...,
+        validation_alias=AliasChoices("text", "content"),
+        description="The message content",
+    )
     sender: Optional[str] = Field(
         default="scammer", description="Message sender (scammer / user)"
     )
@@ -31,12 +37,16 @@ class MessageField(BaseModel):
 class HoneypotRequest(BaseModel):
     """Incoming request to the honeypot endpoint."""
 
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     sessionId: str = Field(
         ...,
         description="Unique session ID. Reuse for follow-up messages.",
     )
+    # Tried in order: a plain string short-circuits, objects go to MessageField
     message: Union[str, MessageField] = Field(
         ...,
+        union_mode="left_to_right",
         description="Scammer's message (plain string or MessageField object).",
     )
     conversationHistory: Optional[List[Dict]] = Field(
@@ -0,0 +1,81 @@
+"""
+Single-pass phrase matching over a fixed vocabulary.
+
+Keyword and trigger scans used to test every phrase with ``phrase in text``,
+one substring search per vocabulary entry.  :class:`PhraseMatcher` finds
+every vocabulary phrase occurring in a text in a single pass:
+
+    - an Aho-Corasick automaton when ``pyahocorasick`` is installed
+    - otherwise a compiled regex built from a trie of the vocabulary
+
+Both report exactly the phrases for which ``phrase in text`` holds,
+including overlapping ones (e.g. "tax" and "tax refund").
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+try:
+    import ahocorasick
+except ImportError:  # optional C extension — regex fallback below
+    ahocorasick = None
+
+
+def _trie_regex(phrases: Iterable[str]) -> str:
+    """
+    Build a regex matching the longest vocabulary phrase at a position.
+
+    Phrases are factored by common prefix, so the regex engine follows
+    the text one character at a time instead of trying every phrase.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end-of-phrase marker
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A phrase ending here makes the longer continuations optional
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class PhraseMatcher:
+    """Find which phrases of a fixed vocabulary occur in a text."""
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        # Vocabulary order (duplicates dropped) — results are reported in it
+        self._rank: dict[str, int] = {p: i for i, p in enumerate(dict.fromkeys(phrases))}
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for phrase in self._rank:
+                self._automaton.add_word(phrase, phrase)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            # The lookahead tries every start position and captures the
+            # longest phrase there; every other phrase starting at that
+            # position is one of its prefixes.
+            self._regex = re.compile(f"(?=({_trie_regex(self._rank)}))")
+            self._prefixes: dict[str, tuple[str, ...]] = {
+                p: tuple(q for q in self._rank if p.startswith(q)) for p in self._rank
+            }
+
+    def find(self, text: str) -> list[str]:
+        """Return the vocabulary phrases contained in *text*, in vocabulary order."""
+        if self._automaton is not None:
+            found = {phrase for _end, phrase in self._automaton.iter(text)}
+        else:
+            found = set()
+            for longest in self._regex.findall(text):
+                found.update(self._prefixes[longest])
+        return sorted(found, key=self._rank.__getitem__)
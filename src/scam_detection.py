@@ -9,57 +9,139 @@ a scam, the greeting just hasn't revealed it yet).
 Red-flag identification runs independently and annotates every detected
 category (urgency, authority impersonation, financial request, etc.)
 for investigative reporting.
+
+The per-turn pipeline uses :func:`analyze_message`, which casefolds and
+scans a message once and hands the results to detection, red-flag
+accumulation and intelligence extraction alike.
 """
 
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass
+
 from src.config import (
-    SCAM_KEYWORDS,
+    SCAM_KEYWORD_MATCHER,
     COMPILED_PATTERNS,
     RED_FLAG_CATEGORIES,
     logger,
 )
+from src.phrase_matcher import PhraseMatcher
+
+# One matcher over every red-flag trigger, mapped back to the categories
+# listing it, so all categories are checked in a single pass over the text.
+_TRIGGER_MATCHER = PhraseMatcher(
+    trigger for cat in RED_FLAG_CATEGORIES.values() for trigger in cat["triggers"]
+)
+_TRIGGER_CATEGORIES: dict[str, set[str]] = {}
+for _cat_id, _cat in RED_FLAG_CATEGORIES.items():
+    for _trigger in _cat["triggers"]:
+        _TRIGGER_CATEGORIES.setdefault(_trigger, set()).add(_cat_id)
+
+
+def _match_red_flag_categories(text_lower: str) -> tuple[list[str], set[str]]:
+    """
+    Return ``(category_ids, triggers)`` found in casefolded *text_lower*.
+
+    Category IDs follow ``RED_FLAG_CATEGORIES`` order; *triggers* is the
+    set of trigger phrases that matched.
+    """
+    triggers = set(_TRIGGER_MATCHER.find(text_lower))
+    hit: set[str] = set()
+    for trigger in triggers:
+        hit |= _TRIGGER_CATEGORIES[trigger]
+    return [cat_id for cat_id in RED_FLAG_CATEGORIES if cat_id in hit], triggers
 
 
 # ============================================================
-# SCAM DETECTION
+# FUSED MESSAGE ANALYSIS
 # ============================================================
 
-def detect_scam(text: str, turn: int = 1) -> bool:
+@dataclass(frozen=True)
+class MessageAnalysis:
+    """Result of scanning one message once, shared by every pipeline step."""
+
+    matches: dict[str, list[str]]  # COMPILED_PATTERNS key → findall() hits
+    keywords: list[str]            # SCAM_KEYWORDS present, in list order
+    red_flags: list[str]           # red-flag labels, in category order
+    pattern_keys: tuple[str, ...]  # COMPILED_PATTERNS keys with any hit
+    confidence: float              # scam confidence (see detect_scam)
+
+
+def analyze_message(text: str) -> MessageAnalysis:
     """
-    Determine whether *text* contains scam intent.
+    Casefold and scan *text* once for every per-turn consumer.
 
-    Turn-aware thresholds:
-        - Turn 1-2: require genuine scam indicators (keywords, patterns,
-          identifiers). A plain greeting like "hello, i am mr. rajesh"
-          won't trigger detection — this keeps the honeypot realistic.
-        - Turn 3+: caller in main.py forces True regardless, so this
-          function is only a secondary check.
+    Confidence layers:
+        1. keyword hits   — +0.6 for 2+, +0.3 for one
+        2. identifiers    — +0.3 per COMPILED_PATTERNS type present
+        3. red flags      — +0.2 if any category matches
     """
     text_lower = text.casefold()
     confidence = 0.0
 
     # --- Layer 1: keyword hits ---
-    keyword_hits = sum(1 for kw in SCAM_KEYWORDS if kw in text_lower)
-    if keyword_hits >= 2:
+    keywords = SCAM_KEYWORD_MATCHER.find(text_lower)
+    if len(keywords) >= 2:
         confidence += 0.6
-        logger.info(f"Scam signal: {keyword_hits} keyword hits (conf +0.6)")
-    elif keyword_hits == 1:
+    elif keywords:
         confidence += 0.3
-        logger.info(f"Scam signal: {keyword_hits} keyword hit (conf +0.3)")
 
-    # --- Layer 2: extractable identifiers ---
-    for key, pat in COMPILED_PATTERNS.items():
-        if pat.search(text):
-            confidence += 0.3
-            logger.info(f"Scam signal: {key} pattern found (conf +0.3)")
+    # --- Layer 2: extractable identifiers (reused by extraction) ---
+    matches = {key: pat.findall(text) for key, pat in COMPILED_PATTERNS.items()}
+    pattern_keys = tuple(key for key, found in matches.items() if found)
+    for _ in pattern_keys:
+        confidence += 0.3
+
+    # --- Layer 3: red-flag category matches (one hit is enough) ---
+    categories, _ = _match_red_flag_categories(text_lower)
+    if categories:
+        confidence += 0.2
+
+    return MessageAnalysis(
+        matches=matches,
+        keywords=keywords,
+        red_flags=[RED_FLAG_CATEGORIES[cat_id]["label"] for cat_id in categories],
+        pattern_keys=pattern_keys,
+        confidence=confidence,
+    )
 
-    # --- Layer 3: red-flag category matches ---
-    for _cat_id, cat in RED_FLAG_CATEGORIES.items():
-        if any(trigger in text_lower for trigger in cat["triggers"]):
-            confidence += 0.2
-            logger.info(f"Scam signal: red-flag '{cat['label']}' (conf +0.2)")
-            break  # one hit is enough for this layer
+
+def _log_signals(analysis: MessageAnalysis) -> None:
+    """Log each confidence contribution of *analysis* at DEBUG."""
+    keyword_hits = len(analysis.keywords)
+    if keyword_hits >= 2:
+        logger.debug("Scam signal: %d keyword hits (conf +0.6)", keyword_hits)
+    elif keyword_hits == 1:
+        logger.debug("Scam signal: 1 keyword hit (conf +0.3)")
+    for key in analysis.pattern_keys:
+        logger.debug("Scam signal: %s pattern found (conf +0.3)", key)
+    if analysis.red_flags:
+        logger.debug("Scam signal: red-flag '%s' (conf +0.2)", analysis.red_flags[0])
+
+
+# ============================================================
+# SCAM DETECTION
+# ============================================================
+
+def detect_scam(text: str, turn: int = 1, analysis: MessageAnalysis | None = None) -> bool:
+    """
+    Determine whether *text* contains scam intent.
+
+    Turn-aware thresholds:
+        - Turn 1-2: require genuine scam indicators (keywords, patterns,
+          identifiers). A plain greeting like "hello, i am mr. rajesh"
+          won't trigger detection — this keeps the honeypot realistic.
+        - Turn 3+: caller in main.py forces True regardless, so this
+          function is only a secondary check.
+
+    Pass the message's *analysis* if the caller already has one.
+    """
+    if analysis is None:
+        analysis = analyze_message(text)
+    if logger.isEnabledFor(logging.DEBUG):
+        _log_signals(analysis)
+    confidence = analysis.confidence
 
     # Threshold depends on turn
     if turn <= 1:
@@ -70,7 +152,7 @@ def detect_scam(text: str, turn: int = 1) -> bool:
         threshold = 0.1   # very easy from turn 3+
 
     is_scam = confidence >= threshold
-    logger.info(f"detect_scam: turn={turn} confidence={confidence:.2f} threshold={threshold} → {is_scam}")
+    logger.info("detect_scam: turn=%d confidence=%.2f threshold=%s → %s", turn, confidence, threshold, is_scam)
     return is_scam
 
 
@@ -89,14 +171,8 @@ def identify_red_flags(text: str) -> list[str]:
     This runs on **every** inbound message and the cumulative set
     is reported in ``redFlagsIdentified`` and ``agentNotes``.
     """
-    text_lower = text.casefold()
-    flags: list[str] = []
-
-    for _cat_id, cat in RED_FLAG_CATEGORIES.items():
-        if any(trigger in text_lower for trigger in cat["triggers"]):
-            flags.append(cat["label"])
-
-    return flags
+    categories, _ = _match_red_flag_categories(text.casefold())
+    return [RED_FLAG_CATEGORIES[cat_id]["label"] for cat_id in categories]
 
 
 def identify_red_flags_detailed(text: str) -> list[dict]:
@@ -106,18 +182,17 @@ def identify_red_flags_detailed(text: str) -> list[dict]:
 
     Useful for detailed agent notes.
     """
-    text_lower = text.casefold()
+    categories, triggers = _match_red_flag_categories(text.casefold())
     results: list[dict] = []
 
-    for cat_id, cat in RED_FLAG_CATEGORIES.items():
-        matched_triggers = [t for t in cat["triggers"] if t in text_lower]
-        if matched_triggers:
-            results.append(
-                {
-                    "category": cat_id,
-                    "label": cat["label"],
-                    "matchedTriggers": matched_triggers,
-                }
-            )
+    for cat_id in categories:
+        cat = RED_FLAG_CATEGORIES[cat_id]
+        results.append(
+            {
+                "category": cat_id,
+                "label": cat["label"],
+                "matchedTriggers": [t for t in cat["triggers"] if t in triggers],
+            }
+        )
 
     return results
@@ -0,0 +1,49 @@
+"""Tests for intelligence extraction and conversationHistory scanning."""
+
+from src.config import COMPILED_PATTERNS
+from src.honeypot_agent import get_session, sessions
+from src.intelligence import HISTORY_SEP, extract_intelligence, history_texts
+
+
+def _fresh_session(session_id):
+    sessions.pop(session_id, None)
+    return get_session(session_id)
+
+
+def test_history_blob_picks_up_edited_earlier_turns():
+    # History is rescanned whole on every request, so an edit anywhere in
+    # it is extracted even after later turns were already seen
+    session = _fresh_session("history-edit")
+    for history in (
+        [{"sender": "scammer", "text": "one"}, {"sender": "user", "text": "two"}],
+        [{"sender": "scammer", "text": "pay 9876543210"}, {"sender": "user", "text": "two"},
+         {"sender": "scammer", "text": "three"}],
+    ):
+        extract_intelligence(HISTORY_SEP.join(history_texts(history)), session)
+
+    assert "9876543210" in session["extracted_intelligence"]["phoneNumbers"]
+
+
+def test_patterns_do_not_match_across_history_turns():
+    blob = HISTORY_SEP.join(["call +91", "98765 43210", "acct 1234", "5678 9012 3456"])
+    for key, pattern in COMPILED_PATTERNS.items():
+        assert all(HISTORY_SEP not in m for m in pattern.findall(blob)), key
+
+
+def test_non_ascii_digits_do_not_leak_into_phone_variants():
+    session = _fresh_session("non-ascii-digits")
+    extract_intelligence("+91 (987) 654-3210 १२३४५६७८९० 09876543210", session)
+
+    # \d lets the Devanagari run into the match; the verbatim and
+    # separator-stripped forms keep it, generated variants must not
+    assert session["extracted_intelligence"]["phoneNumbers"] == [
+        "+91 (987) 654-3210 १२",
+        "+919876543210१२",
+        "+91-9876543210",
+        "+919876543210",
+        "09876543210",
+        "9876543210",
+        "+91 98765 43210",
+        "+91-98765-43210",
+    ]
+    assert session["phone_digits"] == {"919876543210", "9876543210", "09876543210"}